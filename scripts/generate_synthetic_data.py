@@ -8,172 +8,344 @@ Outputs (in /data/raw):
     - orders.csv
     - order_items.csv
     - payments.csv
+
+With --sqlite, the same tables are written straight into a SQLite database
+instead, skipping the CSV round-trip.
 """
 
 from __future__ import annotations
 
 import argparse
-import csv
+import gzip
+import os
 import random
-import uuid
-from dataclasses import dataclass
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import UTC, datetime, timedelta
+from itertools import chain, islice, repeat
 from pathlib import Path
-from typing import Iterable, List
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 from faker import Faker
+from ingest_to_sqlite import TABLES, connect, load_tables, remove_database
 
 ROOT = Path(__file__).resolve().parents[1]
 OUTPUT_DIR = ROOT / "data" / "raw"
+WRITE_BATCH_SIZE = 10_000
+WRITE_BUFFER_SIZE = 1 << 20
+# Level 1 keeps gzip cheap enough that compressing usually beats writing the
+# uncompressed bytes.
+GZIP_LEVEL = 1
+# Below this many rows in total, starting worker processes costs more than
+# formatting the CSV files serially.
+PARALLEL_WRITE_MIN_ROWS = 100_000
+
+# Upper bounds on how many distinct values Faker generates per text column;
+# rows sample from these pools instead of calling Faker once per row.
+FIRST_NAME_POOL_SIZE = 500
+LAST_NAME_POOL_SIZE = 500
+COUNTRY_POOL_SIZE = 250
+CATCH_PHRASE_POOL_SIZE = 1000
+
+# bytes.translate tables that stamp the RFC 4122 version-4 and variant bits.
+_UUID_VERSION_BITS = bytes((b & 0x0F) | 0x40 for b in range(256))
+_UUID_VARIANT_BITS = bytes((b & 0x3F) | 0x80 for b in range(256))
+
+
+# Tables are held column-wise (one list per field) rather than as a list of
+# row objects; zip(*table) yields the rows when they are written out.
+class Customers(NamedTuple):
+    id: List[str]
+    first_name: List[str]
+    last_name: List[str]
+    email: List[str]
+    country: List[str]
+
+
+class Products(NamedTuple):
+    id: List[str]
+    name: List[str]
+    category: List[str]
+    price: List[float]
 
 
-@dataclass(frozen=True)
-class Customer:
-    id: str
-    first_name: str
-    last_name: str
-    email: str
-    country: str
+class Orders(NamedTuple):
+    id: List[str]
+    customer_id: List[str]
+    order_date: List[str]
+    status: List[str]
 
 
-@dataclass(frozen=True)
-class Product:
-    id: str
-    name: str
-    category: str
-    price: float
+class OrderItems(NamedTuple):
+    id: List[str]
+    order_id: List[str]
+    product_id: List[str]
+    quantity: List[int]
+    unit_price: List[float]
 
 
-@dataclass(frozen=True)
-class Order:
-    id: str
-    customer_id: str
-    order_date: datetime
-    status: str
+class Payments(NamedTuple):
+    id: List[str]
+    order_id: List[str]
+    payment_method: List[str]
+    amount: List[float]
+    paid_at: List[str]
 
 
-@dataclass(frozen=True)
-class OrderItem:
-    id: str
-    order_id: str
-    product_id: str
-    quantity: int
-    unit_price: float
+def _quote(value: str) -> str:
+    """Quote free-text values only when they contain CSV special characters."""
+    if "," in value or '"' in value or "\n" in value or "\r" in value:
+        return '"' + value.replace('"', '""') + '"'
+    return value
 
 
-@dataclass(frozen=True)
-class Payment:
-    id: str
-    order_id: str
-    payment_method: str
-    amount: float
-    paid_at: datetime
+def _batched(lines: Iterator[str], size: int) -> Iterator[List[str]]:
+    while batch := list(islice(lines, size)):
+        yield batch
 
 
-def _write_csv(path: Path, headers: Iterable[str], rows: Iterable[Iterable[str]]) -> None:
+def _write_rows_fast(path: Path, header_line: str, lines: Iterable[str]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", newline="", encoding="utf-8") as fp:
-        writer = csv.writer(fp)
-        writer.writerow(headers)
-        writer.writerows(rows)
-
-
-def generate_customers(fake: Faker, count: int) -> List[Customer]:
-    customers = []
-    for _ in range(count):
-        first_name = fake.first_name()
-        last_name = fake.last_name()
-        email = f"{first_name}.{last_name}.{uuid.uuid4().hex[:6]}@example.com".lower()
-        customers.append(
-            Customer(
-                id=str(uuid.uuid4()),
-                first_name=first_name,
-                last_name=last_name,
-                email=email,
-                country=fake.country(),
-            )
+    lines = iter(lines)
+    if path.suffix == ".gz":
+        fp = gzip.open(
+            path, "wt", compresslevel=GZIP_LEVEL, newline="", encoding="utf-8"
         )
-    return customers
+    else:
+        fp = path.open("w", newline="", encoding="utf-8", buffering=WRITE_BUFFER_SIZE)
+    with fp:
+        fp.write(header_line)
+        for batch in _batched(lines, WRITE_BATCH_SIZE):
+            fp.writelines(batch)
+
+
+def _header_line(fields: Iterable[str]) -> str:
+    return ",".join(fields) + "\n"
+
+
+def _uuid_batch(count: int) -> List[str]:
+    """Return ``count`` random UUID4 strings drawn from a single urandom call."""
+    buf = bytearray(os.urandom(16 * count))
+    buf[6::16] = buf[6::16].translate(_UUID_VERSION_BITS)
+    buf[8::16] = buf[8::16].translate(_UUID_VARIANT_BITS)
+    h = buf.hex()
+    return [
+        f"{h[i:i + 8]}-{h[i + 8:i + 12]}-{h[i + 12:i + 16]}-"
+        f"{h[i + 16:i + 20]}-{h[i + 20:i + 32]}"
+        for i in range(0, 32 * count, 32)
+    ]
+
+
+def _make_pool(make: Callable[[], str], pool_size: int, count: int) -> List[str]:
+    return [make() for _ in range(min(count, pool_size))]
+
+
+def _pool_picks(pool: List[str], count: int) -> Sequence[int]:
+    """Index every entry once when the pool covers all rows, else resample."""
+    if count <= len(pool):
+        return range(count)
+    return random.choices(range(len(pool)), k=count)
+
+
+def _sample_pool(make: Callable[[], str], pool_size: int, count: int) -> List[str]:
+    pool = _make_pool(make, pool_size, count)
+    return [pool[i] for i in _pool_picks(pool, count)]
+
+
+def generate_customers(fake: Faker, count: int) -> Customers:
+    first_pool = _make_pool(fake.first_name, FIRST_NAME_POOL_SIZE, count)
+    last_pool = _make_pool(fake.last_name, LAST_NAME_POOL_SIZE, count)
+    # Lower-case each pool entry once rather than every generated email.
+    first_pool_lower = [name.lower() for name in first_pool]
+    last_pool_lower = [name.lower() for name in last_pool]
+    first_picks = _pool_picks(first_pool, count)
+    last_picks = _pool_picks(last_pool, count)
+    emails = [
+        f"{first_pool_lower[i]}.{last_pool_lower[j]}."
+        f"{random.getrandbits(24):06x}@example.com"
+        for i, j in zip(first_picks, last_picks)
+    ]
+    return Customers(
+        id=_uuid_batch(count),
+        first_name=[first_pool[i] for i in first_picks],
+        last_name=[last_pool[j] for j in last_picks],
+        email=emails,
+        country=_sample_pool(fake.country, COUNTRY_POOL_SIZE, count),
+    )
 
 
-def generate_products(fake: Faker, count: int) -> List[Product]:
+def generate_products(fake: Faker, count: int) -> Products:
     categories = ["Electronics", "Apparel", "Home", "Sports", "Beauty"]
-    products = []
-    for _ in range(count):
-        category = random.choice(categories)
-        price = round(random.uniform(5, 500), 2)
-        products.append(
-            Product(
-                id=str(uuid.uuid4()),
-                name=fake.catch_phrase(),
-                category=category,
-                price=price,
-            )
-        )
-    return products
+    return Products(
+        id=_uuid_batch(count),
+        name=_sample_pool(fake.catch_phrase, CATCH_PHRASE_POOL_SIZE, count),
+        category=random.choices(categories, k=count),
+        price=[round(random.uniform(5, 500), 2) for _ in range(count)],
+    )
 
 
-def generate_orders(fake: Faker, customers: List[Customer], count: int) -> List[Order]:
+def generate_orders(fake: Faker, customers: Customers, count: int) -> Orders:
     statuses = ["pending", "processing", "fulfilled", "cancelled"]
     now = datetime.now(UTC)
-    orders = []
-    for _ in range(count):
-        order_date = now - timedelta(days=random.randint(0, 180))
-        orders.append(
-            Order(
-                id=str(uuid.uuid4()),
-                customer_id=random.choice(customers).id,
-                order_date=order_date,
-                status=random.choices(statuses, weights=[0.2, 0.5, 0.25, 0.05])[0],
-            )
-        )
-    return orders
+    # Orders only ever land on one of 181 day offsets, so format those once.
+    day_stamps = [(now - timedelta(days=days)).isoformat() for days in range(181)]
+    return Orders(
+        id=_uuid_batch(count),
+        customer_id=random.choices(customers.id, k=count),
+        order_date=random.choices(day_stamps, k=count),
+        status=random.choices(statuses, weights=[0.2, 0.5, 0.25, 0.05], k=count),
+    )
 
 
 def generate_order_items(
-    orders: List[Order],
-    products: List[Product],
+    orders: Orders,
+    products: Products,
     max_items_per_order: int,
-) -> List[OrderItem]:
-    items = []
-    for order in orders:
-        for _ in range(random.randint(1, max_items_per_order)):
-            product = random.choice(products)
-            quantity = random.randint(1, 5)
-            items.append(
-                OrderItem(
-                    id=str(uuid.uuid4()),
-                    order_id=order.id,
-                    product_id=product.id,
-                    quantity=quantity,
-                    unit_price=product.price,
-                )
-            )
-    return items
-
-
-def generate_payments(orders: List[Order], items: List[OrderItem]) -> List[Payment]:
+) -> OrderItems:
+    item_counts = random.choices(range(1, max_items_per_order + 1), k=len(orders.id))
+    order_ids = list(chain.from_iterable(map(repeat, orders.id, item_counts)))
+
+    total_items = len(order_ids)
+    product_ids = products.id
+    product_prices = products.price
+    product_indexes = random.choices(range(len(product_ids)), k=total_items)
+    return OrderItems(
+        id=_uuid_batch(total_items),
+        order_id=order_ids,
+        product_id=[product_ids[i] for i in product_indexes],
+        quantity=random.choices(range(1, 6), k=total_items),
+        unit_price=[product_prices[i] for i in product_indexes],
+    )
+
+
+def generate_payments(orders: Orders, items: OrderItems) -> Payments:
     payment_methods = ["card", "paypal", "bank_transfer", "gift_card"]
-    totals = {}
-    for item in items:
-        totals.setdefault(item.order_id, 0)
-        totals[item.order_id] += item.quantity * item.unit_price
-
-    payments = []
-    for order in orders:
-        payments.append(
-            Payment(
-                id=str(uuid.uuid4()),
-                order_id=order.id,
-                payment_method=random.choice(payment_methods),
-                amount=round(totals.get(order.id, 0), 2),
-                paid_at=order.order_date + timedelta(hours=random.randint(1, 48)),
-            )
+    totals = defaultdict(float)
+    for order_id, quantity, unit_price in zip(
+        items.order_id, items.quantity, items.unit_price
+    ):
+        totals[order_id] += quantity * unit_price
+
+    count = len(orders.id)
+    # Order dates take at most 181 values and delays 48, so parse each distinct
+    # order stamp and format each distinct (stamp, delay) pair only once.
+    stamp_delays = list(zip(orders.order_date, random.choices(range(1, 49), k=count)))
+    order_dates = {
+        stamp: datetime.fromisoformat(stamp) for stamp in set(orders.order_date)
+    }
+    paid_stamps = {
+        (stamp, hours): (order_dates[stamp] + timedelta(hours=hours)).isoformat()
+        for stamp, hours in set(stamp_delays)
+    }
+    return Payments(
+        id=_uuid_batch(count),
+        order_id=orders.id,
+        payment_method=random.choices(payment_methods, k=count),
+        amount=[round(totals.get(order_id, 0.0), 2) for order_id in orders.id],
+        paid_at=[paid_stamps[pair] for pair in stamp_delays],
+    )
+
+
+def _customer_lines(customers: Customers) -> Iterator[str]:
+    return (
+        f"{id_},{_quote(first_name)},{_quote(last_name)},"
+        f"{_quote(email)},{_quote(country)}\n"
+        for id_, first_name, last_name, email, country in zip(*customers)
+    )
+
+
+def _product_lines(products: Products) -> Iterator[str]:
+    return (
+        f"{id_},{_quote(name)},{category},{price}\n"
+        for id_, name, category, price in zip(*products)
+    )
+
+
+def _order_lines(orders: Orders) -> Iterator[str]:
+    return (
+        f"{id_},{customer_id},{order_date},{status}\n"
+        for id_, customer_id, order_date, status in zip(*orders)
+    )
+
+
+def _order_item_lines(order_items: OrderItems) -> Iterator[str]:
+    return (
+        f"{id_},{order_id},{product_id},{quantity},{unit_price}\n"
+        for id_, order_id, product_id, quantity, unit_price in zip(*order_items)
+    )
+
+
+def _payment_lines(payments: Payments) -> Iterator[str]:
+    return (
+        f"{id_},{order_id},{method},{amount:.2f},{paid_at}\n"
+        for id_, order_id, method, amount, paid_at in zip(*payments)
+    )
+
+
+# (output path, column-wise table, function formatting that table's CSV lines)
+CsvJob = Tuple[Path, NamedTuple, Callable[[Any], Iterator[str]]]
+
+
+def _write_table_csv(job: CsvJob) -> None:
+    path, table, format_lines = job
+    _write_rows_fast(path, _header_line(table._fields), format_lines(table))
+
+
+def _write_csv_tables(jobs: List[CsvJob]) -> None:
+    # The tables are independent, so large runs format and flush each file in
+    # its own process rather than serially under the GIL.
+    workers = min(len(jobs), os.cpu_count() or 1)
+    total_rows = sum(len(table.id) for _, table, _ in jobs)
+    if workers == 1 or total_rows < PARALLEL_WRITE_MIN_ROWS:
+        for job in jobs:
+            _write_table_csv(job)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_write_table_csv, jobs))
+
+
+def _write_sqlite(
+    db_path: Path,
+    customers: Customers,
+    products: Products,
+    orders: Orders,
+    order_items: OrderItems,
+    payments: Payments,
+) -> None:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    remove_database(db_path)
+
+    tables = {
+        "customers": customers,
+        "products": products,
+        "orders": orders,
+        "order_items": order_items,
+        "payments": payments,
+    }
+    conn = connect(db_path)
+    try:
+        load_tables(
+            conn,
+            {
+                name: chain([table._fields], zip(*table))
+                for name, table in tables.items()
+            },
         )
-    return payments
+    finally:
+        conn.close()
 
 
-def _parse_args() -> argparse.Namespace:
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Generate synthetic e-commerce CSV files."
     )
@@ -198,11 +370,22 @@ def _parse_args() -> argparse.Namespace:
         default=OUTPUT_DIR,
         help="Directory to write CSV files into",
     )
-    return parser.parse_args()
+    output_format = parser.add_mutually_exclusive_group()
+    output_format.add_argument(
+        "--sqlite",
+        type=Path,
+        default=None,
+        help="Write directly into this SQLite database instead of CSV files",
+    )
+    output_format.add_argument(
+        "--compress",
+        action="store_true",
+        help="Write gzip-compressed .csv.gz files instead of plain CSV",
+    )
+    return parser.parse_args(argv)
 
 
-def main() -> None:
-    args = _parse_args()
+def run(args: argparse.Namespace) -> None:
     fake = Faker()
     if args.seed is not None:
         Faker.seed(args.seed)
@@ -218,41 +401,35 @@ def main() -> None:
     order_items = generate_order_items(orders, products, args.max_items_per_order)
     payments = generate_payments(orders, order_items)
 
-    _write_csv(
-        output_dir / "customers.csv",
-        Customer.__dataclass_fields__.keys(),
-        (vars(customer).values() for customer in customers),
-    )
-    _write_csv(
-        output_dir / "products.csv",
-        Product.__dataclass_fields__.keys(),
-        (vars(product).values() for product in products),
-    )
-    _write_csv(
-        output_dir / "orders.csv",
-        ["id", "customer_id", "order_date", "status"],
-        (
-            [order.id, order.customer_id, order.order_date.isoformat(), order.status]
-            for order in orders
-        ),
-    )
-    _write_csv(
-        output_dir / "order_items.csv",
-        OrderItem.__dataclass_fields__.keys(),
-        (vars(item).values() for item in order_items),
-    )
-    _write_csv(
-        output_dir / "payments.csv",
-        ["id", "order_id", "payment_method", "amount", "paid_at"],
-        (
-            [p.id, p.order_id, p.payment_method, f"{p.amount:.2f}", p.paid_at.isoformat()]
-            for p in payments
-        ),
-    )
+    if args.sqlite is not None:
+        db_path = args.sqlite.resolve()
+        _write_sqlite(db_path, customers, products, orders, order_items, payments)
+        print(f"Wrote {db_path} with 5 tables.")
+        return
+
+    suffix = ".csv.gz" if args.compress else ".csv"
+    jobs = [
+        (output_dir / f"customers{suffix}", customers, _customer_lines),
+        (output_dir / f"products{suffix}", products, _product_lines),
+        (output_dir / f"orders{suffix}", orders, _order_lines),
+        (output_dir / f"order_items{suffix}", order_items, _order_item_lines),
+        (output_dir / f"payments{suffix}", payments, _payment_lines),
+    ]
+    # Clear every table's previous output in both formats before writing, so a
+    # run that stops partway leaves tables missing instead of a mix of old and
+    # new files that ingest would load without complaint.
+    for table in TABLES:
+        for stale in (".csv", ".csv.gz"):
+            (output_dir / f"{table}{stale}").unlink(missing_ok=True)
+    _write_csv_tables(jobs)
 
     print(f"Wrote {output_dir} with 5 CSV files.")
 
 
+def main() -> None:
+    run(_parse_args())
+
+
 if __name__ == "__main__":
     main()
 
@@ -7,18 +7,24 @@ from __future__ import annotations
 
 import argparse
 import csv
+import gzip
 import sqlite3
 from pathlib import Path
+from typing import Dict, Iterable, Sequence
 
 ROOT = Path(__file__).resolve().parents[1]
 RAW_DIR = ROOT / "data" / "raw"
 DB_PATH = ROOT / "data" / "sqlite" / "ecommerce.db"
+READ_BUFFER_SIZE = 1 << 20
+TABLES = ["customers", "products", "orders", "order_items", "payments"]
 
 
+# Tables are created without primary keys so bulk inserts don't maintain a
+# btree per row; uniqueness is enforced by INDEX_STATEMENTS once loaded.
 CREATE_STATEMENTS = [
     """
     CREATE TABLE customers (
-        id TEXT PRIMARY KEY,
+        id TEXT NOT NULL,
         first_name TEXT NOT NULL,
         last_name TEXT NOT NULL,
         email TEXT NOT NULL,
@@ -27,7 +33,7 @@ CREATE_STATEMENTS = [
     """,
     """
     CREATE TABLE products (
-        id TEXT PRIMARY KEY,
+        id TEXT NOT NULL,
         name TEXT NOT NULL,
         category TEXT NOT NULL,
         price REAL NOT NULL
@@ -35,7 +41,7 @@ CREATE_STATEMENTS = [
     """,
     """
     CREATE TABLE orders (
-        id TEXT PRIMARY KEY,
+        id TEXT NOT NULL,
         customer_id TEXT NOT NULL REFERENCES customers(id),
         order_date TEXT NOT NULL,
         status TEXT NOT NULL
@@ -43,7 +49,7 @@ CREATE_STATEMENTS = [
     """,
     """
     CREATE TABLE order_items (
-        id TEXT PRIMARY KEY,
+        id TEXT NOT NULL,
         order_id TEXT NOT NULL REFERENCES orders(id),
         product_id TEXT NOT NULL REFERENCES products(id),
         quantity INTEGER NOT NULL,
@@ -52,7 +58,7 @@ CREATE_STATEMENTS = [
     """,
     """
     CREATE TABLE payments (
-        id TEXT PRIMARY KEY,
+        id TEXT NOT NULL,
         order_id TEXT NOT NULL REFERENCES orders(id),
         payment_method TEXT NOT NULL,
         amount REAL NOT NULL,
@@ -61,21 +67,93 @@ CREATE_STATEMENTS = [
     """,
 ]
 
+INDEX_STATEMENTS = [
+    "CREATE UNIQUE INDEX idx_customers_id ON customers(id);",
+    "CREATE UNIQUE INDEX idx_products_id ON products(id);",
+    "CREATE UNIQUE INDEX idx_orders_id ON orders(id);",
+    "CREATE UNIQUE INDEX idx_order_items_id ON order_items(id);",
+    "CREATE UNIQUE INDEX idx_payments_id ON payments(id);",
+]
+
+# The database is rebuilt from the CSV files on every run, so durability is
+# traded for bulk-load speed. page_size must come first: it only takes effect
+# before any table exists and cannot change once the database is in WAL mode.
+PRAGMAS = [
+    "page_size=32768",
+    "journal_mode=WAL",
+    "synchronous=OFF",
+    "temp_store=MEMORY",
+    "cache_size=-65536",
+    "mmap_size=268435456",
+    "foreign_keys=OFF",
+]
+
+
+def connect(db_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path)
+    for pragma in PRAGMAS:
+        conn.execute(f"PRAGMA {pragma}")
+    return conn
+
+
+def remove_database(db_path: Path) -> None:
+    """Delete the database together with any WAL files left next to it."""
+    for suffix in ("", "-wal", "-shm"):
+        db_path.with_name(db_path.name + suffix).unlink(missing_ok=True)
+
+
+def _csv_path(raw_dir: Path, table: str) -> Path:
+    """Return ``<table>.csv.gz`` if present, else ``<table>.csv``."""
+    plain = raw_dir / f"{table}.csv"
+    compressed = raw_dir / f"{table}.csv.gz"
+    if compressed.exists():
+        if plain.exists():
+            raise FileExistsError(
+                f"Both {plain.name} and {compressed.name} exist in {raw_dir}; "
+                "remove one or regenerate the data"
+            )
+        return compressed
+    return plain
+
 
 def _load_csv_rows(path: Path):
-    with path.open("r", encoding="utf-8") as fp:
-        reader = csv.DictReader(fp)
-        yield from reader
+    if path.suffix == ".gz":
+        fp = gzip.open(path, "rt", newline="", encoding="utf-8")
+    else:
+        fp = path.open("r", newline="", encoding="utf-8", buffering=READ_BUFFER_SIZE)
+    with fp:
+        yield from csv.reader(fp)
 
 
 def _insert_many(conn: sqlite3.Connection, table: str, rows):
-    rows = list(rows)
-    if not rows:
+    """Insert positional CSV rows; the first row names the columns."""
+    rows = iter(rows)
+    columns = next(rows, None)
+    if columns is None:
         return
-    columns = rows[0].keys()
     placeholders = ",".join(["?"] * len(columns))
     sql = f"INSERT INTO {table} ({','.join(columns)}) VALUES ({placeholders})"
-    conn.executemany(sql, ([row[col] for col in columns] for row in rows))
+    conn.executemany(sql, rows)
+
+
+def load_tables(
+    conn: sqlite3.Connection, tables: Dict[str, Iterable[Sequence]]
+) -> None:
+    """Create the schema, bulk-load every table and index it in one transaction.
+
+    Each iterable yields the column names first, followed by the data rows.
+    """
+    conn.executescript("\n".join(CREATE_STATEMENTS))
+    with conn:
+        for table, rows in tables.items():
+            _insert_many(conn, table, rows)
+
+        for statement in INDEX_STATEMENTS:
+            conn.execute(statement)
+
+    # WAL only helps during the load; switching back checkpoints it into the
+    # main file so readers don't need write access for the -shm file.
+    conn.execute("PRAGMA journal_mode=DELETE")
 
 
 def _parse_args() -> argparse.Namespace:
@@ -84,7 +162,7 @@ def _parse_args() -> argparse.Namespace:
         "--raw-dir",
         type=Path,
         default=RAW_DIR,
-        help="Directory containing generated CSV files",
+        help="Directory containing generated CSV (or .csv.gz) files",
     )
     parser.add_argument(
         "--db-path",
@@ -106,23 +184,15 @@ def main() -> None:
     db_path = args.db_path.resolve()
 
     db_path.parent.mkdir(parents=True, exist_ok=True)
-    if db_path.exists() and not args.keep_existing:
-        db_path.unlink()
+    if not args.keep_existing:
+        remove_database(db_path)
 
-    conn = sqlite3.connect(db_path)
+    conn = connect(db_path)
     try:
-        for statement in CREATE_STATEMENTS:
-            conn.execute(statement)
-
-        _insert_many(conn, "customers", _load_csv_rows(raw_dir / "customers.csv"))
-        _insert_many(conn, "products", _load_csv_rows(raw_dir / "products.csv"))
-        _insert_many(conn, "orders", _load_csv_rows(raw_dir / "orders.csv"))
-        _insert_many(
-            conn, "order_items", _load_csv_rows(raw_dir / "order_items.csv")
+        load_tables(
+            conn,
+            {table: _load_csv_rows(_csv_path(raw_dir, table)) for table in TABLES},
         )
-        _insert_many(conn, "payments", _load_csv_rows(raw_dir / "payments.csv"))
-
-        conn.commit()
         print(f"Ingested CSV data into {db_path}")
     finally:
         conn.close()
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# The scripts import each other as top-level modules, as they do when run
+# directly, so their directory has to be importable from the tests.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
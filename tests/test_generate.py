@@ -1,23 +1,35 @@
 import csv
+import io
+import sqlite3
 import subprocess
 import sys
+import uuid
 from pathlib import Path
 
-ROOT = Path(__file__).resolve().parents[1]
-SCRIPT = ROOT / "scripts" / "generate_synthetic_data.py"
+import pytest
 
+import generate_synthetic_data
+from faker import Faker
+from generate_synthetic_data import (
+    Products,
+    _customer_lines,
+    _order_lines,
+    _parse_args,
+    _product_lines,
+    _uuid_batch,
+    _write_csv_tables,
+    generate_customers,
+    generate_orders,
+    generate_products,
+    run,
+)
 
-def _count_rows(path: Path) -> int:
-    with path.open(newline="", encoding="utf-8") as fp:
-        reader = csv.reader(fp)
-        return sum(1 for _ in reader)
+ROOT = Path(__file__).resolve().parents[1]
+INGEST_SCRIPT = ROOT / "scripts" / "ingest_to_sqlite.py"
 
 
-def test_generate_creates_all_files(tmp_path):
-    output_dir = tmp_path / "raw"
-    cmd = [
-        sys.executable,
-        str(SCRIPT),
+def _run_generator(*extra_args: str) -> None:
+    argv = [
         "--customers",
         "5",
         "--products",
@@ -28,10 +40,44 @@ def test_generate_creates_all_files(tmp_path):
         "2",
         "--seed",
         "123",
-        "--output-dir",
-        str(output_dir),
+        *extra_args,
     ]
-    subprocess.run(cmd, check=True, cwd=ROOT)
+    run(_parse_args(argv))
+
+
+def _count_rows(path: Path) -> int:
+    with path.open(newline="", encoding="utf-8") as fp:
+        reader = csv.reader(fp)
+        return sum(1 for _ in reader)
+
+
+def test_uuid_batch_yields_valid_uuid4_strings():
+    ids = _uuid_batch(20_000)
+    assert len(set(ids)) == len(ids)
+    for value in ids:
+        parsed = uuid.UUID(value)
+        assert parsed.version == 4
+        assert parsed.variant == uuid.RFC_4122
+        assert str(parsed) == value
+
+
+def test_product_lines_round_trip_through_csv_reader():
+    names = ["plain", "comma, inside", 'say "hi"', "line\nbreak", "carriage\rreturn"]
+    products = Products(
+        id=[str(i) for i in range(len(names))],
+        name=names,
+        category=["Home"] * len(names),
+        price=[1.5] * len(names),
+    )
+    text = "".join(_product_lines(products))
+    rows = list(csv.reader(io.StringIO(text, newline="")))
+    assert [row[1] for row in rows] == names
+    assert all(len(row) == 4 for row in rows)
+
+
+def test_generate_creates_all_files(tmp_path):
+    output_dir = tmp_path / "raw"
+    _run_generator("--output-dir", str(output_dir))
 
     expected_files = [
         "customers.csv",
@@ -45,3 +91,74 @@ def test_generate_creates_all_files(tmp_path):
         assert file_path.exists(), f"{filename} missing"
         assert _count_rows(file_path) > 1, f"{filename} should contain data rows"
 
+
+def test_parallel_csv_writes_match_serial_output(tmp_path, monkeypatch):
+    fake = Faker()
+    Faker.seed(7)
+    customers = generate_customers(fake, 30)
+    products = generate_products(fake, 10)
+    orders = generate_orders(fake, customers, 40)
+
+    def jobs(directory: Path):
+        return [
+            (directory / "customers.csv", customers, _customer_lines),
+            (directory / "products.csv", products, _product_lines),
+            (directory / "orders.csv", orders, _order_lines),
+        ]
+
+    _write_csv_tables(jobs(tmp_path / "serial"))
+
+    monkeypatch.setattr(generate_synthetic_data, "PARALLEL_WRITE_MIN_ROWS", 0)
+    monkeypatch.setattr(generate_synthetic_data.os, "cpu_count", lambda: 4)
+    _write_csv_tables(jobs(tmp_path / "parallel"))
+
+    for name in ["customers.csv", "products.csv", "orders.csv"]:
+        serial = (tmp_path / "serial" / name).read_bytes()
+        assert (tmp_path / "parallel" / name).read_bytes() == serial
+
+
+def test_generate_writes_sqlite_directly(tmp_path):
+    db_path = tmp_path / "ecommerce.db"
+    _run_generator("--output-dir", str(tmp_path / "raw"), "--sqlite", str(db_path))
+
+    assert not db_path.with_name(db_path.name + "-wal").exists()
+    conn = sqlite3.connect(db_path)
+    try:
+        (journal_mode,) = conn.execute("PRAGMA journal_mode").fetchone()
+        assert journal_mode == "delete"
+        for table in ["customers", "products", "orders", "order_items", "payments"]:
+            (count,) = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+            assert count > 0, f"{table} should contain rows"
+    finally:
+        conn.close()
+
+
+def test_sqlite_and_compress_are_mutually_exclusive(tmp_path):
+    with pytest.raises(SystemExit):
+        _parse_args(["--sqlite", str(tmp_path / "ecommerce.db"), "--compress"])
+
+
+def test_compressed_output_round_trips_through_ingest(tmp_path):
+    output_dir = tmp_path / "raw"
+    db_path = tmp_path / "ecommerce.db"
+    _run_generator("--output-dir", str(output_dir))
+    _run_generator("--output-dir", str(output_dir), "--compress")
+    assert (output_dir / "orders.csv.gz").exists()
+    assert not (output_dir / "orders.csv").exists()
+
+    cmd = [
+        sys.executable,
+        str(INGEST_SCRIPT),
+        "--raw-dir",
+        str(output_dir),
+        "--db-path",
+        str(db_path),
+    ]
+    subprocess.run(cmd, check=True, cwd=ROOT)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        (count,) = conn.execute("SELECT COUNT(*) FROM orders").fetchone()
+        assert count == 8
+    finally:
+        conn.close()